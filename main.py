@@ -1,16 +1,26 @@
+import asyncio
+import base64
+import hashlib
+import logging
 import os
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Request
+import orjson
+from cachetools import LRUCache, TTLCache
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, Field, EmailStr
 
-from database import db, create_document, get_documents
+from database import db, create_document, get_documents, utcnow
 from schemas import Product, Order, OrderItem
+from stripe_events import apply_stripe_event, enqueue_stripe_event
 
 # Stripe setup
 import stripe
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure
 from datetime import datetime
 
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
@@ -18,10 +28,26 @@ STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
 BACKEND_ORIGIN = os.getenv("BACKEND_ORIGIN", "http://localhost:8000")
 
+# Processed Stripe event ids are kept this long to drop redelivered events.
+STRIPE_EVENT_LOG_TTL = 7 * 86400
+
 if STRIPE_SECRET_KEY:
     stripe.api_key = STRIPE_SECRET_KEY
 
-app = FastAPI(title="TheRawKing API")
+logger = logging.getLogger(__name__)
+
+
+def dumps_json(content) -> bytes:
+    # ObjectId and other BSON leftovers fall back to str; Mongo datetimes are naive UTC.
+    return orjson.dumps(content, default=str, option=orjson.OPT_NAIVE_UTC)
+
+
+class DefaultJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+
+app = FastAPI(title="TheRawKing API", default_response_class=DefaultJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,13 +58,33 @@ app.add_middleware(
 )
 
 
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves streaming NDJSON endpoints uncompressed.
+
+    Starlette's gzip responder holds small chunks inside zlib until its buffer
+    fills, which would stop line-by-line delivery of the NDJSON stream.
+    """
+
+    uncompressed_paths = frozenset({"/api/products.ndjson"})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.uncompressed_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Product listings are repetitive JSON (URLs, sizes, categories) and compress well.
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=512, compresslevel=5)
+
+
 @app.get("/")
 def read_root():
     return {"message": "TheRawKing backend running"}
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -52,7 +98,7 @@ def test_database():
     try:
         if db is not None:
             response["database"] = "✅ Connected"
-            collections = db.list_collection_names()
+            collections = await db.list_collection_names()
             response["collections"] = collections[:10]
             response["connection_status"] = "Connected"
     except Exception as e:
@@ -62,8 +108,10 @@ def test_database():
 
 
 # Seed products
+# Fixed _ids make the seed idempotent when several workers seed at once.
 MOON_PRODUCTS = [
     {
+        "_id": ObjectId("000000000000000000000001"),
         "title": "Lunar Phase Tee",
         "description": "Premium cotton tee featuring the moon phases in subtle reflective ink.",
         "price": 45.0,
@@ -80,6 +128,7 @@ MOON_PRODUCTS = [
         "stock_count": 42,
     },
     {
+        "_id": ObjectId("000000000000000000000002"),
         "title": "Midnight Runner",
         "description": "Moisture-wicking performance fabric.",
         "price": 55.0,
@@ -96,6 +145,7 @@ MOON_PRODUCTS = [
         "stock_count": 18,
     },
     {
+        "_id": ObjectId("000000000000000000000003"),
         "title": "Lunar Graphic",
         "description": "Bold moon-phase print.",
         "price": 50.0,
@@ -112,6 +162,7 @@ MOON_PRODUCTS = [
         "stock_count": 27,
     },
     {
+        "_id": ObjectId("000000000000000000000004"),
         "title": "Eclipse Minimal Tee",
         "description": "Clean eclipse ring chest print. Minimal. Bold. Cosmic.",
         "price": 49.0,
@@ -130,16 +181,151 @@ MOON_PRODUCTS = [
 ]
 
 
-def seed_products_if_empty():
-    if db is None:
+# Set once the product collection is known to be populated, so the emptiness
+# probe runs at most once per process instead of on every listing request.
+_seeded: bool = False
+
+# Short-lived cache of rendered /api/products bodies keyed by query params.
+# Entries are (body, etag); cleared whenever products are written.
+PRODUCTS_CACHE_TTL = 30
+_products_cache: TTLCache = TTLCache(maxsize=512, ttl=PRODUCTS_CACHE_TTL)
+
+
+async def seed_products_if_empty():
+    global _seeded
+    if _seeded or db is None:
         return
-    existing = list(db["product"].find({}).limit(1))
+    existing = await db["product"].find({}).limit(1).to_list(length=1)
     if not existing:
-        for p in MOON_PRODUCTS:
-            try:
-                create_document("product", Product(**p))
-            except Exception:
-                pass
+        now = utcnow()
+        docs = [
+            {**Product(**p).model_dump(), "_id": p["_id"], "created_at": now, "updated_at": now}
+            for p in MOON_PRODUCTS
+        ]
+        try:
+            await db["product"].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Another worker seeded the same _ids first.
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+        _products_cache.clear()
+    _seeded = True
+
+
+# (collection, keys, options, required). Required indexes back correctness:
+# webhook dedupe relies on the unique event_id and search needs the text index.
+INDEXES = [
+    ("product", [("category", 1), ("created_at", -1)], {}, False),
+    ("product", [("featured", 1)], {}, False),
+    ("product", [("price", 1)], {}, False),
+    ("product", [("created_at", -1), ("_id", -1)], {}, False),
+    (
+        "product",
+        [("title", "text"), ("description", "text"), ("tag", "text")],
+        {"weights": {"title": 5, "tag": 3, "description": 1}, "name": "product_text"},
+        True,
+    ),
+    ("order", [("stripe_session_id", 1)], {"unique": True, "sparse": True}, False),
+    ("order", [("stripe_payment_intent_id", 1)], {"sparse": True}, False),
+    ("email_subscriber", [("email", 1)], {"unique": True}, False),
+    ("stripe_event_log", [("event_id", 1)], {"unique": True}, True),
+    ("stripe_event_log", [("ts", 1)], {"expireAfterSeconds": STRIPE_EVENT_LOG_TTL}, False),
+]
+
+
+# Seconds between index creation attempts while Mongo is unreachable.
+INDEX_RETRY_INTERVAL = 30
+
+
+async def ensure_indexes() -> bool:
+    """Create indexes backing the product listing, webhook and subscribe lookups.
+
+    Each index is created independently so one failure (e.g. existing duplicates
+    blocking a unique index) doesn't skip the rest. A conflict on a required
+    index is re-raised so startup fails loudly. Returns False without trying the
+    remaining indexes if Mongo can't be reached.
+    """
+    if db is None:
+        return True
+    for collection, keys, options, required in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except ConnectionFailure as e:
+            logger.warning("Database unreachable, index creation deferred: %s", e)
+            return False
+        except OperationFailure as e:
+            logger.error("Could not create index %s on %s: %s", keys, collection, e)
+            if required:
+                raise
+    return True
+
+
+async def _retry_ensure_indexes():
+    while True:
+        await asyncio.sleep(INDEX_RETRY_INTERVAL)
+        if await ensure_indexes():
+            return
+
+
+# Emails recently confirmed as subscribed, so repeated submits skip Mongo.
+# Exact membership: an address is only here after its upsert succeeded.
+_seen_emails: LRUCache = LRUCache(maxsize=50_000)
+
+
+_index_retry_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def on_startup():
+    global _index_retry_task
+    if not await ensure_indexes():
+        # Database unreachable at boot: keep retrying the indexes in the background,
+        # and let list_products seed lazily once Mongo is back.
+        _index_retry_task = asyncio.create_task(_retry_ensure_indexes())
+        return
+    try:
+        await seed_products_if_empty()
+    except Exception as e:
+        logger.warning("Startup database setup failed: %s", e)
+
+
+# Fields needed by the storefront grid; the detail endpoint returns the full document.
+PRODUCT_LIST_PROJECTION = {
+    "title": 1,
+    "price": 1,
+    "currency": 1,
+    "images": {"$slice": 1},
+    "tag": 1,
+    "category": 1,
+    "featured": 1,
+    "in_stock": 1,
+    "color": 1,
+    "created_at": 1,
+}
+
+
+# Fields read from a product when building a checkout session.
+CHECKOUT_PRODUCT_PROJECTION = {"title": 1, "price": 1, "currency": 1, "images": {"$slice": 1}}
+
+# Session parameters that are identical for every checkout.
+_CHECKOUT_DEFAULTS = {
+    "mode": "payment",
+    "payment_method_types": ["card"],
+    "metadata": {"brand": "TheRawKing"},
+}
+
+
+def _price_data(prod: dict) -> dict:
+    """Build the Stripe price_data block for a product document"""
+    image = (prod.get("images") or [None])[0]
+    return {
+        "currency": prod.get("currency", "usd"),
+        "product_data": {
+            "name": prod.get("title", "Item"),
+            "images": [image] if image else [],
+        },
+        "unit_amount": int(float(prod.get("price", 0)) * 100),
+    }
 
 
 class CreateCheckoutItem(BaseModel):
@@ -158,46 +344,121 @@ class SubscribePayload(BaseModel):
 
 
 @app.get("/api/products")
-def list_products(category: Optional[str] = None, sort: Optional[str] = None, limit: int = 24, offset: int = 0, featured: Optional[bool] = None, search: Optional[str] = None):
+async def list_products(request: Request, category: Optional[str] = None, sort: Optional[str] = None, limit: int = 24, offset: int = 0, featured: Optional[bool] = None, search: Optional[str] = None, after: Optional[str] = None):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    seed_products_if_empty()
+    await seed_products_if_empty()
+
+    key = (category, sort, limit, offset, featured, search, after)
+    cached = _products_cache.get(key)
+    if cached is None:
+        docs, next_cursor = await _query_products(category, sort, limit, offset, featured, search, after)
+        body = dumps_json({"products": docs, "next_cursor": next_cursor})
+        # Weak, since gzip and identity encodings of the body share the same tag.
+        cached = (body, f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        _products_cache[key] = cached
+
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={PRODUCTS_CACHE_TTL}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+@app.get("/api/products.ndjson")
+async def stream_products(category: Optional[str] = None, sort: Optional[str] = None, limit: int = 24, offset: int = 0, featured: Optional[bool] = None, search: Optional[str] = None, after: Optional[str] = None):
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not available")
+    await seed_products_if_empty()
+
+    cursor, _ = _products_cursor(category, sort, limit, offset, featured, search, after, max_limit=1000)
+    cursor = cursor.batch_size(64)
+
+    async def gen():
+        async for d in cursor:
+            d["id"] = str(d.pop("_id"))
+            yield dumps_json(d) + b"\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
+
+
+async def _query_products(category, sort, limit, offset, featured, search, after):
+    cursor, keyset = _products_cursor(category, sort, limit, offset, featured, search, after)
+    docs = await cursor.to_list(length=None)
+    next_cursor = None
+    if keyset and docs and len(docs) == max(1, min(100, limit)) and docs[-1].get("created_at"):
+        next_cursor = _encode_page_cursor(docs[-1])
+    for d in docs:
+        d["id"] = str(d.pop("_id"))
+    return docs, next_cursor
+
 
+def _encode_page_cursor(doc) -> str:
+    raw = f"{doc['created_at'].isoformat()},{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_page_cursor(after: str):
+    try:
+        ts, oid = base64.urlsafe_b64decode(after.encode()).decode().rsplit(",", 1)
+        return datetime.fromisoformat(ts), ObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _products_cursor(category, sort, limit, offset, featured, search, after=None, max_limit=100):
+    """Build the listing cursor; also reports whether it is keyset-paginatable"""
     query = {}
     if category and category.lower() != "all":
         query["category"] = category
     if featured is True:
         query["featured"] = True
+    projection = dict(PRODUCT_LIST_PROJECTION)
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}},
-            {"tag": {"$regex": search, "$options": "i"}},
-        ]
-
-    sort_spec = [("created_at", -1)]
-    if sort == "price_asc":
+        query["$text"] = {"$search": search}
+        projection["score"] = {"$meta": "textScore"}
+
+    # Newest-first is tie-broken on _id so (created_at, _id) is a total order for keyset paging.
+    sort_spec = [("created_at", -1), ("_id", -1)]
+    if search and not sort:
+        sort_spec = [("score", {"$meta": "textScore"})]
+    elif sort == "price_asc":
         sort_spec = [("price", 1)]
     elif sort == "price_desc":
         sort_spec = [("price", -1)]
-    elif sort == "newest":
-        sort_spec = [("created_at", -1)]
+    keyset = sort_spec[0][0] == "created_at"
 
-    cursor = db["product"].find(query).sort(sort_spec).skip(offset).limit(max(1, min(100, limit)))
-    docs = list(cursor)
-    for d in docs:
-        d["id"] = str(d.pop("_id"))
-    return {"products": docs}
+    if after:
+        if not keyset:
+            raise HTTPException(status_code=400, detail="after is only supported for newest-first listings")
+        ts, oid = _decode_page_cursor(after)
+        query["$or"] = [{"created_at": {"$lt": ts}}, {"created_at": ts, "_id": {"$lt": oid}}]
+
+    n = max(1, min(max_limit, limit))
+    cursor = db["product"].find(query, projection).sort(sort_spec)
+    if not after:
+        # Deprecated: skip() walks every skipped document; clients should page with `after`.
+        cursor = cursor.skip(offset)
+    return cursor.limit(n), keyset
 
 
 @app.get("/api/products/{product_id}")
-def get_product(product_id: str):
+async def get_product(product_id: str):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    try:
-        doc = db["product"].find_one({"_id": ObjectId(product_id)})
-    except Exception:
-        doc = None
+    doc = None
+    if ObjectId.is_valid(product_id):
+        doc = await db["product"].find_one({"_id": ObjectId(product_id)})
     if not doc:
         raise HTTPException(status_code=404, detail="Product not found")
     doc["id"] = str(doc.pop("_id"))
@@ -205,59 +466,61 @@ def get_product(product_id: str):
 
 
 @app.post("/api/subscribe")
-def subscribe_email(payload: SubscribePayload):
+async def subscribe_email(payload: SubscribePayload):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
     email = payload.email.lower()
-    existing = db["email_subscriber"].find_one({"email": email})
-    if existing:
+    if email in _seen_emails:
         return {"ok": True, "message": "Already subscribed"}
-    db["email_subscriber"].insert_one({"email": email, "created_at": datetime.utcnow()})
-    return {"ok": True}
+    try:
+        res = await db["email_subscriber"].update_one(
+            {"email": email},
+            {"$setOnInsert": {"email": email, "created_at": utcnow()}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # Lost an upsert race against a concurrent submit of the same email.
+        res = None
+    _seen_emails[email] = True
+    return {"ok": True, "message": "Subscribed" if res and res.upserted_id else "Already subscribed"}
 
 
 @app.post("/api/create-checkout-session")
-def create_checkout_session(payload: CreateCheckoutRequest, request: Request):
+async def create_checkout_session(payload: CreateCheckoutRequest, request: Request):
     if not STRIPE_SECRET_KEY:
         raise HTTPException(status_code=500, detail="Stripe not configured. Set STRIPE_SECRET_KEY.")
 
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
 
+    bad = [item.product_id for item in payload.items if not ObjectId.is_valid(item.product_id)]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Invalid product ids: {bad}")
+    ids = [ObjectId(item.product_id) for item in payload.items]
+
+    products = await db["product"].find({"_id": {"$in": ids}}, CHECKOUT_PRODUCT_PROJECTION).to_list(length=None)
+    by_id = {p["_id"]: p for p in products}
+
     line_items = []
     order_items: List[OrderItem] = []
+    # The same product often appears several times (e.g. different sizes); build its price_data once.
+    price_data_by_id = {}
 
-    for item in payload.items:
-        try:
-            prod = db["product"].find_one({"_id": ObjectId(item.product_id)})
-        except Exception:
-            prod = None
+    for item, oid in zip(payload.items, ids):
+        prod = by_id.get(oid)
         if not prod:
             raise HTTPException(status_code=404, detail=f"Product {item.product_id} not found")
 
-        price_in_cents = int(float(prod.get("price", 0)) * 100)
-        title = prod.get("title", "Item")
-        currency = prod.get("currency", "usd")
-        image = (prod.get("images") or [None])[0]
-
-        line_items.append(
-            {
-                "price_data": {
-                    "currency": currency,
-                    "product_data": {
-                        "name": title,
-                        "images": [image] if image else [],
-                    },
-                    "unit_amount": price_in_cents,
-                },
-                "quantity": item.quantity,
-            }
-        )
+        price_data = price_data_by_id.get(oid)
+        if price_data is None:
+            price_data = price_data_by_id[oid] = _price_data(prod)
+
+        line_items.append({"price_data": price_data, "quantity": item.quantity})
 
         order_items.append(
             OrderItem(
-                product_id=str(prod.get("_id")),
-                title=title,
+                product_id=str(oid),
+                title=price_data["product_data"]["name"],
                 price=float(prod.get("price", 0)),
                 quantity=item.quantity,
                 size=item.size,
@@ -268,14 +531,14 @@ def create_checkout_session(payload: CreateCheckoutRequest, request: Request):
     cancel_url = f"{FRONTEND_ORIGIN}/checkout/cancel"
 
     try:
-        session = stripe.checkout.Session.create(
-            mode="payment",
-            payment_method_types=["card"],
+        # stripe-python is synchronous; keep its HTTPS round-trip off the event loop
+        session = await asyncio.to_thread(
+            stripe.checkout.Session.create,
+            **_CHECKOUT_DEFAULTS,
             line_items=line_items,
             success_url=success_url,
             cancel_url=cancel_url,
             customer_email=payload.email if payload.email else None,
-            metadata={"brand": "TheRawKing"},
         )
     except stripe.error.StripeError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -292,15 +555,32 @@ def create_checkout_session(payload: CreateCheckoutRequest, request: Request):
     )
 
     try:
-        create_document("order", order)
+        await create_document("order", order)
     except Exception:
         pass
 
     return {"url": session.url}
 
 
+async def _process_stripe_event(event, attempts: int = 3):
+    """Apply an event in-process, forgetting its dedupe record if it keeps failing"""
+    for attempt in range(1, attempts + 1):
+        try:
+            await apply_stripe_event(event["type"], event["data"]["object"])
+            return
+        except Exception:
+            if attempt == attempts:
+                logger.exception("Failed to apply Stripe event %s", event["id"])
+                break
+            await asyncio.sleep(attempt)
+    # The update is an idempotent $set; dropping the log entry lets a redelivery
+    # (or a manual resend from the Stripe dashboard) apply it instead of being deduped.
+    if db is not None:
+        await db["stripe_event_log"].delete_one({"event_id": event["id"]})
+
+
 @app.post("/api/stripe/webhook")
-async def stripe_webhook(request: Request):
+async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
 
@@ -308,38 +588,35 @@ async def stripe_webhook(request: Request):
         return {"received": True, "warning": "No webhook secret set"}
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload=payload, sig_header=sig_header, secret=STRIPE_WEBHOOK_SECRET
+        # HMAC verification and payload parsing are CPU work; run them off the event loop
+        event = await asyncio.to_thread(
+            stripe.Webhook.construct_event,
+            payload=payload, sig_header=sig_header, secret=STRIPE_WEBHOOK_SECRET,
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Webhook error: {e}")
 
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        session_id = session.get("id")
-        if db is not None and session_id:
-            db["order"].update_one(
-                {"stripe_session_id": session_id},
-                {"$set": {"payment_status": "paid", "updated_at": datetime.utcnow()}},
-            )
-
-    if event["type"] == "payment_intent.payment_failed":
-        pi = event["data"]["object"]
-        pid = pi.get("id")
-        if db is not None and pid:
-            db["order"].update_many(
-                {"stripe_payment_intent_id": pid},
-                {"$set": {"payment_status": "failed", "updated_at": datetime.utcnow()}},
+    # Stripe delivers at least once; record the event id and skip replays.
+    if db is not None:
+        try:
+            await db["stripe_event_log"].insert_one(
+                {"event_id": event["id"], "created": event["created"], "ts": utcnow()}
             )
+        except DuplicateKeyError:
+            return {"received": True, "deduped": True}
 
+    # Acknowledge Stripe right away. Order updates go through the Redis-backed
+    # queue when configured, otherwise they run after the response is sent.
+    if not await enqueue_stripe_event(event):
+        background_tasks.add_task(_process_stripe_event, event)
     return {"received": True}
 
 
 @app.get("/api/order/by-session/{session_id}")
-def order_by_session(session_id: str):
+async def order_by_session(session_id: str):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    doc = db["order"].find_one({"stripe_session_id": session_id})
+    doc = await db["order"].find_one({"stripe_session_id": session_id})
     if not doc:
         raise HTTPException(status_code=404, detail="Order not found")
     doc["id"] = str(doc.pop("_id"))
@@ -349,4 +626,14 @@ def order_by_session(session_id: str):
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Each worker process imports main and creates its own Mongo client.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2)),
+        backlog=2048,
+        timeout_keep_alive=15,
+    )
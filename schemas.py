@@ -4,10 +4,12 @@ Database Schemas for TheRawKing
 Each Pydantic model represents a MongoDB collection. Collection name is the lowercase of the class name.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 
 class Product(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     title: str = Field(..., description="Product title")
     description: Optional[str] = Field(None, description="Product description")
     price: float = Field(..., ge=0, description="Price in dollars")
@@ -27,6 +29,8 @@ class OrderItem(BaseModel):
     size: Optional[str] = None
 
 class Order(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     email: str
     items: List[OrderItem]
     total: float
@@ -0,0 +1,178 @@
+"""
+Stripe Event Processing
+
+Applies verified Stripe webhook events to orders. The webhook pushes events
+onto a Redis stream and returns immediately; run `python stripe_events.py` to
+start a worker that drains the stream. Without REDIS_URL (or when Redis is
+down) the API falls back to applying events in-process.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+
+import orjson
+from pymongo import UpdateMany, UpdateOne
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from database import db, utcnow
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL")
+STREAM = "stripe:events"
+GROUP = "stripe-workers"
+STREAM_MAXLEN = 100_000
+
+# The worker flushes a batch after this many events or this much time.
+BATCH_SIZE = 100
+BATCH_WINDOW_MS = 50
+BLOCK_MS = 5000
+# Pause before re-reading pending entries after a failed batch.
+RETRY_DELAY = 2
+# Entries another consumer left unacknowledged this long are taken over.
+CLAIM_IDLE_MS = 60_000
+CLAIM_INTERVAL = 30
+
+_redis = None
+
+
+def get_redis():
+    """Return the shared Redis client, or None when REDIS_URL is not set"""
+    global _redis
+    if _redis is None and REDIS_URL:
+        # Short timeouts so a hung Redis makes the webhook fall back instead of stalling.
+        _redis = aioredis.from_url(
+            REDIS_URL, decode_responses=True, socket_connect_timeout=1, socket_timeout=1
+        )
+    return _redis
+
+
+def order_update_for(event_type: str, obj: dict, now: datetime):
+    """Return the order write for a Stripe event, or None if it needs none"""
+    if event_type == "checkout.session.completed" and obj.get("id"):
+        return UpdateOne(
+            {"stripe_session_id": obj["id"]},
+            {"$set": {"payment_status": "paid", "updated_at": now}},
+        )
+    if event_type == "payment_intent.payment_failed" and obj.get("id"):
+        return UpdateMany(
+            {"stripe_payment_intent_id": obj["id"]},
+            {"$set": {"payment_status": "failed", "updated_at": now}},
+        )
+    return None
+
+
+async def apply_stripe_events(events):
+    """Apply (event_type, object) pairs to orders in a single bulk write"""
+    if db is None:
+        return
+    now = utcnow()
+    ops = [op for op in (order_update_for(t, obj, now) for t, obj in events) if op is not None]
+    if ops:
+        await db["order"].bulk_write(ops, ordered=False)
+
+
+async def apply_stripe_event(event_type: str, obj: dict):
+    """Apply a verified Stripe event to the matching orders"""
+    await apply_stripe_events([(event_type, obj)])
+
+
+async def enqueue_stripe_event(event) -> bool:
+    """Queue an event for the worker; returns False if it must be applied inline"""
+    r = get_redis()
+    if r is None:
+        return False
+    try:
+        await r.xadd(
+            STREAM,
+            {"type": event["type"], "payload": orjson.dumps(event["data"]["object"])},
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+    except Exception as e:
+        logger.warning("Could not queue Stripe event %s: %s", event["id"], e)
+        return False
+    return True
+
+
+async def run_worker(consumer: str):
+    """Drain the event stream forever with at-least-once semantics"""
+    if not REDIS_URL:
+        raise RuntimeError("REDIS_URL is not set")
+    # The worker's reads block server-side, so its socket timeout must outlast BLOCK_MS.
+    r = aioredis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=5,
+        socket_timeout=BLOCK_MS / 1000 + 5,
+    )
+    try:
+        await r.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+    # Start with entries this consumer read but never acknowledged, then new ones.
+    last_id = "0"
+    last_claim = 0.0
+    while True:
+        if time.monotonic() - last_claim >= CLAIM_INTERVAL:
+            last_claim = time.monotonic()
+            # Take over entries stuck with consumers that died (e.g. replaced containers).
+            # With justid=True redis-py returns just the list of claimed ids.
+            claimed = await r.xautoclaim(
+                STREAM, GROUP, consumer, CLAIM_IDLE_MS, start_id="0-0", count=BATCH_SIZE, justid=True
+            )
+            if claimed:
+                last_id = "0"
+
+        if last_id != ">":
+            entries = await _read(r, consumer, last_id, BATCH_SIZE, None)
+            if not entries:
+                last_id = ">"
+                continue
+            last_id = entries[-1][0]
+        else:
+            entries = await _read(r, consumer, ">", BATCH_SIZE, BLOCK_MS)
+            deadline = time.monotonic() + BATCH_WINDOW_MS / 1000
+            while entries and len(entries) < BATCH_SIZE:
+                remaining_ms = int((deadline - time.monotonic()) * 1000)
+                if remaining_ms <= 0:
+                    break
+                more = await _read(r, consumer, ">", BATCH_SIZE - len(entries), remaining_ms)
+                if not more:
+                    break
+                entries += more
+        if not entries:
+            continue
+
+        try:
+            # Pending entries already trimmed from the stream come back without fields.
+            await apply_stripe_events(
+                [(fields["type"], orjson.loads(fields["payload"])) for _, fields in entries if fields]
+            )
+        except Exception:
+            # The updates are idempotent $sets, so leave the whole batch pending and
+            # re-read this consumer's pending entries after a short pause.
+            logger.exception("Failed to apply %d Stripe events", len(entries))
+            await asyncio.sleep(RETRY_DELAY)
+            last_id = "0"
+            continue
+        await r.xack(STREAM, GROUP, *(entry_id for entry_id, _ in entries))
+
+
+async def _read(r, consumer: str, last_id: str, count: int, block_ms):
+    resp = await r.xreadgroup(GROUP, consumer, {STREAM: last_id}, count=count, block=block_ms)
+    return resp[0][1] if resp else []
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # Pending entries of consumers that go away are reclaimed with XAUTOCLAIM,
+    # so the name only has to be unique among running workers.
+    asyncio.run(run_worker(os.getenv("WORKER_NAME", socket.gethostname())))
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import stripe_events
+
+
+def test_worker_drains_queued_events(monkeypatch):
+    server = fakeredis.FakeServer()
+
+    def from_url(url, **kwargs):
+        return fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+
+    applied = []
+
+    async def apply_stripe_events(events):
+        applied.extend(events)
+
+    monkeypatch.setattr(stripe_events, "REDIS_URL", "redis://fake")
+    monkeypatch.setattr(stripe_events, "_redis", None)
+    monkeypatch.setattr(stripe_events.aioredis, "from_url", from_url)
+    monkeypatch.setattr(stripe_events, "apply_stripe_events", apply_stripe_events)
+    monkeypatch.setattr(stripe_events, "BLOCK_MS", 50)
+
+    async def scenario():
+        for i in range(5):
+            event = {
+                "id": f"evt_{i}",
+                "type": "checkout.session.completed",
+                "data": {"object": {"id": f"cs_{i}"}},
+            }
+            assert await stripe_events.enqueue_stripe_event(event)
+
+        worker = asyncio.create_task(stripe_events.run_worker("test-worker"))
+        try:
+            for _ in range(100):
+                if len(applied) == 5:
+                    break
+                assert not worker.done(), worker.exception()
+                await asyncio.sleep(0.02)
+        finally:
+            worker.cancel()
+
+        r = stripe_events.get_redis()
+        pending = await r.xpending(stripe_events.STREAM, stripe_events.GROUP)
+        return pending["pending"]
+
+    assert asyncio.run(scenario()) == 0
+    assert applied == [("checkout.session.completed", {"id": f"cs_{i}"}) for i in range(5)]